@@ -1,64 +1,322 @@
+import os
 import tempfile
 import zipfile
+from contextlib import contextmanager
 from unittest import mock
 from django.contrib.auth.models import Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.reverse import reverse
-from rest_framework.test import APITestCase
+from rest_framework.test import (
+    APIClient, APIRequestFactory, APITestCase, force_authenticate
+)
 
 from mcserver.models import (
     User, Session, Trial, Result, Subject
 )
+from mcserver.views import TrialViewSet
+
+# Most queries a list endpoint may run, per role, for the rows its test can
+# see: six sessions (two with a trial) for the owner and the three public ones
+# for everyone else, or the trial fixtures of TrialsPermissionsTests. The
+# serializers already spend queries on every row, so one more per-row query
+# pushes every role that sees a row over its cap. Update these deliberately
+# when the fixtures change.
+SESSION_LIST_MAX_QUERIES = {'owner': 18, 'admin': 10, 'backend': 10, 'other': 10, 'unverified': 10}
+# /sessions/valid/ only lists the caller's own sessions, which only the owner has
+SESSION_VALID_MAX_QUERIES = {'owner': 13, 'admin': 2, 'backend': 3, 'other': 1, 'unverified': 2}
+TRIAL_LIST_MAX_QUERIES = {'owner': 6, 'admin': 6, 'backend': 6, 'other': 4, 'unverified': 4}
+
+
+def _by_visibility(private, public=None):
+    # Expand {role: status} maps for a private and a public session into one
+    # {(public, role): status} table. `public` defaults to `private`.
+    if public is None:
+        public = private
+    table = {(False, role): status for role, status in private.items()}
+    table.update({(True, role): status for role, status in public.items()})
+    return table
+
+
+# Reads: public sessions are open to everyone, private ones hidden from
+# anyone but the owner and admin/backend.
+_SESSION_READ = _by_visibility(
+    private={'owner': 200, 'admin': 200, 'backend': 200, 'other': 404, 'unverified': 404},
+    public={'owner': 200, 'admin': 200, 'backend': 200, 'other': 200, 'unverified': 200},
+)
+# Actions that only find the session among the caller's own sessions. The
+# ungated ones skip the IsOwner check, so unverified users get 404, not 403.
+_SESSION_OWNER_ONLY = _by_visibility(
+    {'owner': 200, 'admin': 404, 'backend': 404, 'other': 404, 'unverified': 403},
+)
+_SESSION_OWNER_ONLY_UNGATED = _by_visibility(
+    {'owner': 200, 'admin': 404, 'backend': 404, 'other': 404, 'unverified': 404},
+)
+# Actions gated on IsOwner | IsAdmin | IsBackend.
+_SESSION_MANAGE = _by_visibility(
+    {'owner': 200, 'admin': 200, 'backend': 200, 'other': 404, 'unverified': 403},
+)
+
+# One role per way through the session permission classes: the owner
+# (IsOwner), a group member (IsAdmin; backend goes through the same group
+# check in IsBackend), an unrelated verified user, and an unverified user who
+# fails IsOwner's OTP check. Most session action tests run these four;
+# test_get_detail and the list-style tests still cover every role.
+PERMISSION_PATH_ROLES = ('owner', 'admin', 'other', 'unverified')
+
+# Expected status codes for SessionsPermissionsTests, keyed by endpoint and
+# then by (public, role).
+SESSION_PERM_MATRIX = {
+    'get_detail': _SESSION_READ,
+    'post': _by_visibility(
+        {'owner': 201, 'admin': 201, 'backend': 201, 'other': 201, 'unverified': 403},
+    ),
+    'put': _by_visibility(
+        private={'owner': 200, 'admin': 404, 'backend': 404, 'other': 404, 'unverified': 403},
+        public={'owner': 200, 'admin': 200, 'backend': 200, 'other': 403, 'unverified': 403},
+    ),
+    'patch': _by_visibility(
+        private={'owner': 200, 'admin': 404, 'backend': 404, 'other': 404, 'unverified': 403},
+        public={'owner': 200, 'admin': 200, 'backend': 200, 'other': 403, 'unverified': 403},
+    ),
+    'delete': _by_visibility(
+        private={'owner': 204, 'admin': 404, 'backend': 404, 'other': 404, 'unverified': 403},
+        public={'owner': 204, 'admin': 204, 'backend': 204, 'other': 403, 'unverified': 403},
+    ),
+    'rename': _SESSION_MANAGE,
+    'permanent_remove': _SESSION_OWNER_ONLY,
+    'trash': _SESSION_OWNER_ONLY,
+    'restore': _SESSION_OWNER_ONLY,
+    'new_subject': _SESSION_OWNER_ONLY_UNGATED,
+    'record': _SESSION_OWNER_ONLY_UNGATED,
+    'download': _SESSION_READ,
+    'async_download': _by_visibility(
+        private={'owner': 200, 'admin': 404, 'backend': 404, 'other': 404, 'unverified': 404},
+        public={'owner': 200, 'admin': 200, 'backend': 200, 'other': 200, 'unverified': 200},
+    ),
+    'get_session_settings': _SESSION_READ,
+    'set_metadata': _SESSION_MANAGE,
+    'set_subject': _SESSION_OWNER_ONLY,
+    'stop': _SESSION_MANAGE,
+    'cancel_trial': _SESSION_MANAGE,
+    'calibration_img': _SESSION_READ,
+    'neutral_img': _SESSION_READ,
+    'get_session_statuses': _by_visibility(
+        {'owner': 200, 'admin': 200, 'backend': 200, 'other': 200, 'unverified': 403},
+    ),
+    'set_session_status': _by_visibility(
+        {'owner': 403, 'admin': 200, 'backend': 200, 'other': 403, 'unverified': 403},
+    ),
+}
+
+
+# Trial writes: the owner and admin/backend may change a trial; anyone else
+# gets 404 if the session is hidden from them and 403 otherwise.
+_TRIAL_WRITE = _by_visibility(
+    private={'owner': 200, 'admin': 200, 'backend': 200, 'other': 404, 'unverified': 403},
+    public={'owner': 200, 'admin': 200, 'backend': 200, 'other': 403, 'unverified': 403},
+)
+# Trial actions: admin/backend find any trial, everyone else only those in
+# their own sessions, whatever the visibility.
+_TRIAL_MANAGE = _by_visibility(
+    {'owner': 200, 'admin': 200, 'backend': 200, 'other': 404, 'unverified': 403},
+)
+# Queue endpoints for the processing workers.
+_TRIAL_WORKERS_ONLY = _by_visibility(
+    {'owner': 403, 'admin': 200, 'backend': 200, 'other': 403, 'unverified': 403},
+)
+
+# Expected status codes for TrialsPermissionsTests, keyed like
+# SESSION_PERM_MATRIX.
+TRIAL_PERM_MATRIX = {
+    'get_detail': _SESSION_READ,
+    'patch': _TRIAL_WRITE,
+    'delete': {key: 204 if status == 200 else status for key, status in _TRIAL_WRITE.items()},
+    'dequeue': _TRIAL_WORKERS_ONLY,
+    'get_trials_with_status': _TRIAL_WORKERS_ONLY,
+    'rename': _TRIAL_MANAGE,
+    'permanent_remove': _TRIAL_MANAGE,
+    'trash': _TRIAL_MANAGE,
+    'restore': _TRIAL_MANAGE,
+    'modifyTags': _TRIAL_MANAGE,
+}
+
+
+# Results are managed by the owner and the processing workers only; the
+# session's visibility does not matter.
+_RESULT_WRITE = _by_visibility(
+    {'owner': 200, 'admin': 200, 'backend': 200, 'other': 403, 'unverified': 403},
+)
+
+# Expected status codes for ResultsPermissionsTests, keyed like
+# SESSION_PERM_MATRIX.
+RESULT_PERM_MATRIX = {
+    'get_list': _by_visibility(
+        {'owner': 200, 'admin': 200, 'backend': 200, 'other': 200, 'unverified': 403},
+    ),
+    'get_detail': _RESULT_WRITE,
+    'post': {key: 201 if status == 200 else status for key, status in _RESULT_WRITE.items()},
+    'put': _RESULT_WRITE,
+    'patch': _RESULT_WRITE,
+    'delete': {key: 204 if status == 200 else status for key, status in _RESULT_WRITE.items()},
+}
+
+# Subjects have no visibility, so their expectations are keyed by role only.
+_SUBJECT_MANAGE = {'owner': 200, 'admin': 200, 'backend': 200, 'other': 404, 'unverified': 403}
+# Actions that only find the subject among the caller's own subjects.
+_SUBJECT_OWNER_ONLY = {'owner': 200, 'admin': 404, 'backend': 404, 'other': 404, 'unverified': 403}
+
+# Expected status codes for SubjectPermissionsTests, keyed by endpoint and
+# then by role.
+SUBJECT_PERM_MATRIX = {
+    'get_detail': _SUBJECT_MANAGE,
+    'post': {'owner': 201, 'admin': 201, 'backend': 201, 'other': 201, 'unverified': 403},
+    'put': _SUBJECT_MANAGE,
+    'patch': _SUBJECT_MANAGE,
+    'delete': {role: 204 if status == 200 else status for role, status in _SUBJECT_MANAGE.items()},
+    'trash': _SUBJECT_OWNER_ONLY,
+    'restore': _SUBJECT_OWNER_ONLY,
+    'download': _SUBJECT_OWNER_ONLY,
+    'async_download': _SUBJECT_OWNER_ONLY,
+    'permanent_remove': _SUBJECT_OWNER_ONLY,
+}
+
+
+def _detail_url(resource, pk, action=None):
+    # /<resource>/<pk>/, or the URL of one of its detail actions
+    url = f'/{resource}/{pk}/'
+    return f'{url}{action}/' if action else url
+
+
+def _make_dummy_zip():
+    # Write a one-file zip to disk and return its path. The caller deletes it.
+    with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as tmp_zip:
+        with zipfile.ZipFile(tmp_zip, 'w') as zf:
+            zf.writestr('dummy.txt', 'dummy content')
+    return tmp_zip.name
+
 
 # Helper classes
+class QueryCountMixin:
+    @contextmanager
+    def assertMaxQueries(self, num):
+        # Like assertNumQueries, but only fails when more than `num` queries run
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context)
+        self.assertLessEqual(
+            executed, num,
+            "%d queries executed, at most %d expected\nCaptured queries were:\n%s" % (
+                executed, num,
+                '\n'.join('%d. %s' % (i, q['sql']) for i, q in enumerate(context.captured_queries, start=1))
+            )
+        )
+
+
 class UserSetupMixin:
-    def setUpUsers(self):
-        self.owner = User.objects.create_user(username='owner', password='pw')
-        self.owner.otp_verified = True
-        self.owner.save()
-
-        self.admin = User.objects.create_user(username='admin', password='pw')
-        admin_group = Group.objects.create(name='admin')
-        self.admin.groups.add(admin_group)
-
-        self.backend = User.objects.create_user(username='backend', password='pw')
-        backend_group = Group.objects.create(name='backend')
-        self.backend.groups.add(backend_group)
-
-        self.other_user = User.objects.create_user(username='other_user', password='pw')
-        self.other_user.otp_verified = True
-        self.other_user.save()
-
-        self.unverified_user = User.objects.create_user(username='unverified', password='pw')
-        self.unverified_user.otp_verified = False
-        self.unverified_user.save()
-
-        self.users = {
-            'owner': self.owner,
-            'admin': self.admin,
-            'backend': self.backend,
-            'other': self.other_user,
-            'unverified': self.unverified_user,
+    @classmethod
+    def setUpTestData(cls):
+        # Clients authenticate with force_authenticate, so no user needs a
+        # password; create_user() then stores an unusable one without hashing
+        cls.owner = User.objects.create_user(username='owner', otp_verified=True)
+
+        cls.admin = User.objects.create_user(username='admin')
+        admin_group, _ = Group.objects.get_or_create(name='admin')
+        cls.admin.groups.add(admin_group)
+
+        cls.backend = User.objects.create_user(username='backend')
+        backend_group, _ = Group.objects.get_or_create(name='backend')
+        cls.backend.groups.add(backend_group)
+
+        cls.other_user = User.objects.create_user(username='other_user', otp_verified=True)
+
+        cls.unverified_user = User.objects.create_user(username='unverified', otp_verified=False)
+
+        cls.users = {
+            'owner': cls.owner,
+            'admin': cls.admin,
+            'backend': cls.backend,
+            'other': cls.other_user,
+            'unverified': cls.unverified_user,
         }
 
+    @classmethod
+    def setUpClass(cls):
+        # setUpTestData has run by now. The clients hold no database state,
+        # so they are built here rather than alongside the users.
+        super().setUpClass()
+        # One client per role, authenticated once for the whole class
+        cls._clients = {'anonymous': APIClient()}
+        for role, user in cls.users.items():
+            cls._clients[role] = APIClient()
+            cls._clients[role].force_authenticate(user=user)
+
 # Tests
-class SessionsPermissionsTests(UserSetupMixin, APITestCase):
-    def setUp(self):
-        self.setUpUsers()
-        self.list_url = '/sessions/'
-    
+class SessionsPermissionsTests(QueryCountMixin, UserSetupMixin, APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A single dummy archive is served by every download request
+        cls._dummy_zip_path = _make_dummy_zip()
+
+        cls._patchers = [
+            mock.patch('mcserver.views.boto3.client'),
+            mock.patch('mcserver.views.downloadAndZipSession', return_value=cls._dummy_zip_path),
+            mock.patch('mcserver.tasks.download_session_archive.delay'),
+        ]
+        mock_boto_client, _, mock_download_task = [p.start() for p in cls._patchers]
+
+        mock_s3 = mock_boto_client.return_value
+        mock_s3.generate_presigned_url.return_value = 'http://fake-url.com/qr-code'
+        mock_download_task.return_value.id = 'fake-download_session_archive-id'
+
+    @classmethod
+    def tearDownClass(cls):
+        for patcher in cls._patchers:
+            patcher.stop()
+        os.remove(cls._dummy_zip_path)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.list_url = '/sessions/'
+
+        # Shared across tests; whatever a request changes is rolled back with the test
+        cls.public_session, cls.private_session = Session.objects.bulk_create([
+            Session(user=cls.owner, public=True),
+            Session(user=cls.owner, public=False),
+        ])
+
+        # Read by the calibration endpoints, which look the trial up by name
+        cls.public_session_with_calibration, cls.private_session_with_calibration = \
+            Session.objects.bulk_create([
+                Session(user=cls.owner, public=True),
+                Session(user=cls.owner, public=False),
+            ])
+        Trial.objects.bulk_create([
+            Trial(session=cls.public_session_with_calibration, name='calibration'),
+            Trial(session=cls.private_session_with_calibration, name='calibration'),
+        ])
+
     def _setup_session(self, public):
         self.session = Session.objects.create(user=self.owner, public=public)
-        self.detail_url = f'/sessions/{self.session.pk}/'
+
+    def _shared_session(self, public):
+        return self.public_session if public else self.private_session
 
     def test_get_list(self):
         # Test GET /sessions/ (list)
-        public_session = Session.objects.create(user=self.owner, public=True)
-        private_session = Session.objects.create(user=self.owner, public=False)
+        public_session, private_session = Session.objects.bulk_create([
+            Session(user=self.owner, public=True),
+            Session(user=self.owner, public=False),
+        ])
 
         for role in self.users:
             with self.subTest(role=role):
-                self.client.force_authenticate(user=self.users[role])
-                resp = self.client.get(self.list_url)
+                client = self._clients[role]
+                with self.assertMaxQueries(SESSION_LIST_MAX_QUERIES[role]):
+                    resp = client.get(self.list_url)
                 
                 self.assertEqual(resp.status_code, 200)
                 session_ids = [s['id'] for s in resp.data]
@@ -73,97 +331,73 @@ class SessionsPermissionsTests(UserSetupMixin, APITestCase):
     def test_get_detail(self):
         # Test GET /sessions/<pk>/ (retrieve)
         for public in [False, True]:
-            self._setup_session(public)
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk)
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    resp = self.client.get(self.detail_url)
-                    
-                    if role in ['owner', 'admin', 'backend']:
-                        expected = 200
-                    else:
-                        if public is True:
-                            expected = 200
-                        else:
-                            expected = 404
+                    client = self._clients[role]
+                    resp = client.get(url)
+
+                    expected = SESSION_PERM_MATRIX['get_detail'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
     def test_post(self):
         # Test POST /sessions/
         for public in [False, True]:
-            for role in self.users:
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
+                    client = self._clients[role]
                     data = { "user": self.owner.pk,
                              "server": '1.1.1.1',
                              "public": public }
-                    resp = self.client.post(self.list_url, data)
-                    expected = 201 if role in ['owner', 'admin', 'backend', 'other'] else 403
+                    resp = client.post(self.list_url, data, format='json')
+                    expected = SESSION_PERM_MATRIX['post'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
     def test_put(self):
         # Test PUT /sessions/<pk>/ (update)
         for public in [False, True]:
             self._setup_session(public)
-            for role in self.users:
+            url = _detail_url('sessions', self.session.pk)
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
+                    client = self._clients[role]
                     data = { "user": self.owner.pk,
                              "server": '1.1.1.1',
                              "public": public }
-                    resp = self.client.put(self.detail_url, data)
-                    
-                    if public is True:
-                        expected = 200 if role in ['owner', 'admin', 'backend'] else 403
-                    else:
-                        if role == 'owner':
-                            expected = 200
-                        elif role in ['admin', 'backend', 'other']:
-                            expected = 404
-                        else:
-                            expected = 403
+                    resp = client.put(url, data, format='json')
+
+                    expected = SESSION_PERM_MATRIX['put'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
     def test_patch(self):
         # Test PATCH /sessions/<pk>/ (partial_update)
         for public in [False, True]:
             self._setup_session(public)
-            for role in self.users:
+            url = _detail_url('sessions', self.session.pk)
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
+                    client = self._clients[role]
                     data = { "server": '1.1.1.1' }
-                    resp = self.client.patch(self.detail_url, data)
-                    
-                    if public is True:
-                        expected = 200 if role in ['owner', 'admin', 'backend'] else 403
-                    else:
-                        if role == 'owner':
-                            expected = 200
-                        elif role in ['admin', 'backend', 'other']:
-                            expected = 404
-                        else:
-                            expected = 403
+                    resp = client.patch(url, data, format='json')
+
+                    expected = SESSION_PERM_MATRIX['patch'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
     def test_delete(self):
         # Test DELETE /sessions/<pk>/ (destroy)
         for public in [False, True]:
-            for role in self.users:
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    # Re-create the session for delete, to make sure the object exists
-                    self._setup_session(public=public)
-                    self.client.force_authenticate(user=self.users[role])
-                    resp = self.client.delete(self.detail_url)
-                    
-                    if public is True:
-                        expected = 204 if role in ['owner', 'admin', 'backend'] else 403
+                    expected = SESSION_PERM_MATRIX['delete'][(public, role)]
+
+                    # Only a successful delete needs a session of its own
+                    if expected == 204:
+                        session = Session.objects.create(user=self.owner, public=public)
                     else:
-                        if role == 'owner':
-                            expected = 204
-                        elif role in ['admin', 'backend', 'other']:
-                            expected = 404
-                        else:
-                            expected = 403
+                        session = self._shared_session(public)
+                    client = self._clients[role]
+                    resp = client.delete(_detail_url('sessions', session.pk))
                     self.assertEqual(resp.status_code, expected)
 
     def test_search_sessions(self):
@@ -172,8 +406,8 @@ class SessionsPermissionsTests(UserSetupMixin, APITestCase):
             self._setup_session(public=public)
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    resp = self.client.get(f'/sessions/search_sessions/?text={str(self.session.id)[:8]}')
+                    client = self._clients[role]
+                    resp = client.get('/sessions/search_sessions/', {'text': str(self.session.id)[:8]})
                     
                     self.assertEqual(resp.status_code, 200)
                     if role == 'owner':
@@ -183,14 +417,15 @@ class SessionsPermissionsTests(UserSetupMixin, APITestCase):
 
     def test_calibration(self):
         # Test GET and POST /sessions/<pk>/calibration/
-        for public in [False, True]:
-            self._setup_session(public)
-            trial = Trial.objects.create(session=self.session, name='calibration')
+        calibrated_sessions = [(False, self.private_session_with_calibration),
+                               (True, self.public_session_with_calibration)]
+        for public, session in calibrated_sessions:
+            url = _detail_url('sessions', session.pk, 'calibration')
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    get_resp = self.client.get(f'/sessions/{self.session.pk}/calibration/')
-                    post_resp = self.client.post(f'/sessions/{self.session.pk}/calibration/', data={ 'calibration_data': 'data' })
+                    client = self._clients[role]
+                    get_resp = client.get(url)
+                    post_resp = client.post(url, data={ 'calibration_data': 'data' })
                     
                     if role in ['owner', 'admin', 'backend']:
                         self.assertEqual(get_resp.status_code, 200)
@@ -201,13 +436,14 @@ class SessionsPermissionsTests(UserSetupMixin, APITestCase):
 
     def test_get_n_calibrated_cameras(self):
         # Test GET /sessions/<pk>/get_n_calibrated_cameras/
-        for public in [False, True]:
-            self._setup_session(public)
-            trial = Trial.objects.create(session=self.session, name='calibration')
+        calibrated_sessions = [(False, self.private_session_with_calibration),
+                               (True, self.public_session_with_calibration)]
+        for public, session in calibrated_sessions:
+            url = _detail_url('sessions', session.pk, 'get_n_calibrated_cameras')
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    resp = self.client.get(f'/sessions/{self.session.pk}/get_n_calibrated_cameras/')
+                    client = self._clients[role]
+                    resp = client.get(url)
                     if role in ['owner', 'admin', 'backend']:
                         self.assertEqual(resp.status_code, 200)
                     else:
@@ -216,37 +452,35 @@ class SessionsPermissionsTests(UserSetupMixin, APITestCase):
     def test_rename(self):
         # Test POST /sessions/<pk>/rename/
         for public in [False, True]:
-            for role in self.users:
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk, 'rename')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    session = Session.objects.create(user=self.owner, public=public)
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{session.pk}/rename/'
+                    client = self._clients[role]
                     data = { "sessionNewName": "session_new_name" }
-                    resp = self.client.post(url, data)
-                    
-                    if role in ['owner', 'admin', 'backend']:
-                        expected = 200
-                        self.assertEqual(resp.status_code, expected)
-                    else:
-                        expected = 404 if role == 'other' else 403
-                        self.assertEqual(resp.status_code, expected)
+                    resp = client.post(url, data, format='json')
+
+                    expected = SESSION_PERM_MATRIX['rename'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_valid(self):
         # Test GET and POST /sessions/valid
+        session_public, session_private = Session.objects.bulk_create([
+            Session(user=self.owner, public=True),
+            Session(user=self.owner, public=False),
+        ])
+        Trial.objects.bulk_create([
+            Trial(session=session_public, name='neutral', status='done'),
+            Trial(session=session_private, name='neutral', status='done'),
+        ])
+
         for role in self.users:
             with self.subTest(role=role):
-                session_public = Session.objects.create(user=self.owner, public=True)
-                trial_public = Trial.objects.create(session=session_public, 
-                                                    name='neutral',
-                                                    status='done')
-                session_private = Session.objects.create(user=self.owner, public=False)
-                trial_private = Trial.objects.create(session=session_private, 
-                                                     name='neutral',
-                                                     status='done')
-
-                self.client.force_authenticate(user=self.users[role])
-                resp_get = self.client.get('/sessions/valid/')
-                resp_post = self.client.post('/sessions/valid/')
+                client = self._clients[role]
+                with self.assertMaxQueries(SESSION_VALID_MAX_QUERIES[role]):
+                    resp_get = client.get('/sessions/valid/')
+                with self.assertMaxQueries(SESSION_VALID_MAX_QUERIES[role]):
+                    resp_post = client.post('/sessions/valid/')
 
                 if role in ['owner', 'admin', 'backend', 'other']:
                     self.assertEqual(resp_get.status_code, 200)
@@ -276,82 +510,69 @@ class SessionsPermissionsTests(UserSetupMixin, APITestCase):
     def test_permanent_remove(self):
         # Test POST /sessions/<pk>/permanent_remove/
         for public in [False, True]:
-            for role in self.users:
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self._setup_session(public=public)
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/permanent_remove/'
-                    resp = self.client.post(url)
-                    
                     if role == 'owner':
-                        expected = 200
-                        self.assertEqual(resp.status_code, expected)
+                        # The owner is the only role that mutates the session
+                        session = Session.objects.create(user=self.owner, public=public)
                     else:
-                        expected = 404 if role in ['admin', 'backend', 'other'] else 403
-                        self.assertEqual(resp.status_code, expected)
+                        session = self._shared_session(public)
+                    client = self._clients[role]
+                    url = _detail_url('sessions', session.pk, 'permanent_remove')
+                    resp = client.post(url)
+
+                    expected = SESSION_PERM_MATRIX['permanent_remove'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
    
     def test_trash(self):
         # Test POST /sessions/<pk>/trash/
         for public in [False, True]:
-            for role in self.users:
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk, 'trash')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self._setup_session(public=public)
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/trash/'
-                    resp = self.client.post(url)
+                    client = self._clients[role]
+                    resp = client.post(url)
 
-                    if role == 'owner':
-                        expected = 200
-                        self.assertEqual(resp.status_code, expected)
-                    else:
-                        expected = 404 if role in ['admin', 'backend', 'other'] else 403
-                        self.assertEqual(resp.status_code, expected)
+                    expected = SESSION_PERM_MATRIX['trash'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_restore(self):
         # Test POST /sessions/<pk>/restore/
         for public in [False, True]:
-            for role in self.users:
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk, 'restore')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self._setup_session(public=public)
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/restore/'
-                    resp = self.client.post(url)
+                    client = self._clients[role]
+                    resp = client.post(url)
 
-                    if role == 'owner':
-                        expected = 200
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        expected = 404 if role in ['admin', 'backend', 'other'] else 403
-                        self.assertEqual(resp.status_code, expected)
+                    expected = SESSION_PERM_MATRIX['restore'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_new(self):
         # Test GET /sessions/new/
         for role in self.users:
             with self.subTest(role=role):
-                self.client.force_authenticate(user=self.users[role])
-                resp = self.client.get('/sessions/new/')
+                client = self._clients[role]
+                resp = client.get('/sessions/new/')
 
                 if role in ['owner', 'admin', 'backend', 'other']:
                     self.assertEqual(resp.status_code, 200)
                 else:
                     self.assertEqual(resp.status_code, 403)
     
-    @mock.patch('mcserver.views.boto3.client')
-    def test_get_qr(self, mock_boto_client):
-        # Setup mock
-        mock_s3 = mock.Mock()
-        mock_boto_client.return_value = mock_s3
-        mock_s3.generate_presigned_url.return_value = 'http://fake-url.com/qr-code'
-
+    def test_get_qr(self):
         # Test GET /sessions/<pk>/get_qr/
         for public in [False, True]:
             session = Session.objects.create(user=self.owner, 
                                              public=public,
                                              qrcode='fake-qr-code-path.png')
+            url = _detail_url('sessions', session.pk, 'get_qr')
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    resp = self.client.get(f'/sessions/{session.pk}/get_qr/')
+                    client = self._clients[role]
+                    resp = client.get(url)
 
                     if role == 'owner':
                         self.assertEqual(resp.status_code, 200)
@@ -361,313 +582,283 @@ class SessionsPermissionsTests(UserSetupMixin, APITestCase):
     def test_new_subject(self):
         for public in [False, True]:
             self._setup_session(public)
-            for role in self.users:
+            url = _detail_url('sessions', self.session.pk, 'new_subject')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/new_subject/'
-                    resp = self.client.get(url)
-                    
-                    if role == 'owner':
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        self.assertEqual(resp.status_code, 404)
+                    client = self._clients[role]
+                    resp = client.get(url)
+
+                    expected = SESSION_PERM_MATRIX['new_subject'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_status(self):
-        for public in [False, True]:
-            self._setup_session(public)
-            for role in self.users:
-                with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/status/'
-                    resp = self.client.get(url)
-                    self.assertEqual(resp.status_code, 200)
+        # Every caller gets 200, so the owner, an unrelated user and an
+        # anonymous client stand in for the full role list
+        # The view does not look at visibility, so the private session is enough
+        callers = ['owner', 'other', 'anonymous']
+        url = _detail_url('sessions', self.private_session.pk, 'status')
+        for role in callers:
+            with self.subTest(role=role):
+                client = self._clients[role]
+                resp = client.get(url)
+                self.assertEqual(resp.status_code, 200)
 
     def test_record(self):
         for public in [False, True]:
             self._setup_session(public)
-            for role in self.users:
+            url = _detail_url('sessions', self.session.pk, 'record') + '?name=new_trial_name'
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/record/?name=new_trial_name'
-                    resp = self.client.get(url)
-                    
-                    if role == 'owner':
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        self.assertEqual(resp.status_code, 404)
+                    client = self._clients[role]
+                    resp = client.get(url)
+
+                    expected = SESSION_PERM_MATRIX['record'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
  
-    @mock.patch('mcserver.views.downloadAndZipSession')
-    def test_download(self, mock_download_and_zip):
+    def test_download(self):
         # Test GET /sessions/<pk>/download/
         for public in [False, True]:
-            self._setup_session(public)
-            for role in self.users:
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk, 'download')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    # Create a temporary zip file
-                    with tempfile.NamedTemporaryFile(suffix='.zip') as tmp_zip:
-                        with zipfile.ZipFile(tmp_zip.name, 'w') as zf:
-                            zf.writestr('dummy.txt', 'dummy content')
-                        tmp_zip.flush()
-                        mock_download_and_zip.return_value = tmp_zip.name
-
-                        self.client.force_authenticate(user=self.users[role])
-                        resp = self.client.get(f'/sessions/{self.session.pk}/download/')
-
-                        if role in ['other', 'unverified'] and public is False:
-                            self.assertEqual(resp.status_code, 404)
-                        else:
-                            self.assertEqual(resp.status_code, 200)
-                            self.assertEqual(resp['Content-Type'], 'application/zip')
-
-    @mock.patch('mcserver.tasks.download_session_archive.delay')
-    def test_async_download(self, mock_download_task):
-        mock_task = mock.Mock()
-        mock_task.id = 'fake-download_session_archive-id'
-        mock_download_task.return_value = mock_task
+                    client = self._clients[role]
+                    resp = client.get(url)
+
+                    expected = SESSION_PERM_MATRIX['download'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
+                    if expected == 200:
+                        self.assertEqual(resp['Content-Type'], 'application/zip')
 
+    def test_async_download(self):
         # Test GET /sessions/<pk>/async_download/
         for public in [False, True]:
-            self._setup_session(public)
-            for role in self.users:
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk, 'async-download')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/async-download/'
-                    resp = self.client.get(url)
-
-                    if public is False:
-                        if role == 'owner':
-                            self.assertEqual(resp.status_code, 200)
-                            self.assertEqual(resp.data, {'task_id': 'fake-download_session_archive-id'})
-                        else: 
-                            self.assertEqual(resp.status_code, 404)
-                    else:
-                        self.assertEqual(resp.status_code, 200)
+                    client = self._clients[role]
+                    resp = client.get(url)
+
+                    expected = SESSION_PERM_MATRIX['async_download'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
+                    if expected == 200:
                         self.assertEqual(resp.data, {'task_id': 'fake-download_session_archive-id'})
 
     def test_get_session_permission(self):
         # Test GET /sessions/<pk>/get_session_permission/
-        for public in [False, True]:
-            self._setup_session(public)
-            for role in self.users:
-                with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/get_session_permission/'
-                    resp = self.client.get(url)
-                    self.assertEqual(resp.status_code, 200)
+        # Every caller gets 200, so the owner, an unrelated user and an
+        # anonymous client stand in for the full role list
+        # The view does not look at visibility, so the private session is enough
+        callers = ['owner', 'other', 'anonymous']
+        url = _detail_url('sessions', self.private_session.pk, 'get_session_permission')
+        for role in callers:
+            with self.subTest(role=role):
+                client = self._clients[role]
+                resp = client.get(url)
+                self.assertEqual(resp.status_code, 200)
 
     def test_get_session_settings(self):
         # Test GET /sessions/<pk>/get_session_settings/
         for public in [False, True]:
-            self._setup_session(public)
-            for role in self.users:
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk, 'get_session_settings')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/get_session_settings/'
-                    resp = self.client.get(url)
+                    client = self._clients[role]
+                    resp = client.get(url)
 
-                    if role in ['other', 'unverified'] and public is False:
-                        self.assertEqual(resp.status_code, 404)
-                    else:
-                        self.assertEqual(resp.status_code, 200)
+                    expected = SESSION_PERM_MATRIX['get_session_settings'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_set_metadata(self):
         # Test GET /sessions/<pk>/set_metadata/
         for public in [False, True]:
             self._setup_session(public)
-            for role in self.users:
+            url = _detail_url('sessions', self.session.pk, 'set_metadata')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/set_metadata/'
+                    client = self._clients[role]
                     data = {}
-                    resp = self.client.get(url, data)
+                    resp = client.get(url, data)
 
-                    if role in ['owner', 'admin', 'backend']:
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        expected = 404 if role == 'other' else 403
-                        self.assertEqual(resp.status_code, expected)
+                    expected = SESSION_PERM_MATRIX['set_metadata'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_set_subject(self):
         # Test GET /sessions/<pk>/set_subject/
+        # Assigning the subject only changes the session, so one will do
+        subject = Subject.objects.create(name='test_subject', user=self.owner)
         for public in [False, True]:
-            for role in self.users:
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self._setup_session(public)
-                    subject = Subject.objects.create(name='test_subject', 
-                                                     user=self.users['owner'])
+                    if role == 'owner':
+                        # The owner is the only role that mutates the session
+                        session = Session.objects.create(user=self.owner, public=public)
+                    else:
+                        session = self._shared_session(public)
 
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/set_subject/'
+                    client = self._clients[role]
+                    url = _detail_url('sessions', session.pk, 'set_subject')
                     data = { "subject_id": subject.pk }
-                    resp = self.client.get(url, data)
+                    resp = client.get(url, data)
 
-                    if role == 'owner':
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        expected = 404 if role in ['admin', 'backend', 'other'] else 403
-                        self.assertEqual(resp.status_code, expected)
+                    expected = SESSION_PERM_MATRIX['set_subject'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_stop(self):
         for public in [False, True]:
-            for role in self.users:
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk, 'stop')
+            Trial.objects.create(session=session, name='test_trial')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self._setup_session(public)
-                    trial = Trial.objects.create(session=self.session, name='test_trial')
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/stop/'
-                    resp = self.client.get(url)
-                    
-                    if role in ['owner', 'admin', 'backend']:
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        expected = 404 if role == 'other' else 403
-                        self.assertEqual(resp.status_code, expected)
+                    client = self._clients[role]
+                    resp = client.get(url)
+
+                    expected = SESSION_PERM_MATRIX['stop'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_cancel_trial(self):
         for public in [False, True]:
-            for role in self.users:
-                self._setup_session(public)
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk, 'cancel_trial')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/cancel_trial/'
-                    resp = self.client.get(url)
-                    
-                    if role in ['owner', 'admin', 'backend']:
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        expected = 404 if role == 'other' else 403
-                        self.assertEqual(resp.status_code, expected)
+                    client = self._clients[role]
+                    resp = client.get(url)
+
+                    expected = SESSION_PERM_MATRIX['cancel_trial'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_calibration_img(self):
         for public in [False, True]:
-            self._setup_session(public)
-            for role in self.users:
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk, 'calibration_img')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/calibration_img/'
-                    resp = self.client.get(url)
-                    
-                    if public is True:
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        if role in ['owner', 'admin', 'backend']:
-                            self.assertEqual(resp.status_code, 200)
-                        else:
-                            self.assertEqual(resp.status_code, 404)
+                    client = self._clients[role]
+                    resp = client.get(url)
 
-    def test_neutral_img(self):
-        for public in [False, True]:
-            self._setup_session(public)
-            for role in self.users:
-                with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/neutral_img/'
-                    resp = self.client.get(url)
-                    
-                    if public is True:
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        if role in ['owner', 'admin', 'backend']:
-                            self.assertEqual(resp.status_code, 200)
-                        else:
-                            self.assertEqual(resp.status_code, 404)
+                    expected = SESSION_PERM_MATRIX['calibration_img'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
-    def test_get_session_statuses(self):
+    def test_neutral_img(self):
         for public in [False, True]:
-            self._setup_session(public)
-            for role in self.users:
+            session = self._shared_session(public)
+            url = _detail_url('sessions', session.pk, 'neutral_img')
+            for role in PERMISSION_PATH_ROLES:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/get_session_statuses/'
-                    data = {'status': 'done'}
-                    resp = self.client.post(url, data)
-                    if role in ['admin', 'backend', 'owner', 'other']:
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        self.assertEqual(resp.status_code, 403)
+                    client = self._clients[role]
+                    resp = client.get(url)
 
-    def test_set_session_status(self):
-        for public in [False, True]:
-            self._setup_session(public)
-            for role in self.users:
-                with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/sessions/{self.session.pk}/set_session_status/'
-                    data = { "status": "archived" }
-                    resp = self.client.post(url, data)
+                    expected = SESSION_PERM_MATRIX['neutral_img'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
-                    if role in ['admin', 'backend']:
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        expected = 403
-                        self.assertEqual(resp.status_code, expected)
+    def test_get_session_statuses(self):
+        # A list route: the shared sessions are all it needs to search
+        for role in PERMISSION_PATH_ROLES:
+            with self.subTest(role=role):
+                client = self._clients[role]
+                url = '/sessions/get_session_statuses/'
+                data = {'status': 'done'}
+                resp = client.post(url, data, format='json')
 
+                expected = SESSION_PERM_MATRIX['get_session_statuses'][(False, role)]
+                self.assertEqual(resp.status_code, expected)
 
-class TrialsPermissionsTests(UserSetupMixin, APITestCase):
-    def setUp(self):
-        self.setUpUsers()
-        self.list_url = '/trials/'
-    
-    def _setup_trial(self, public):
-        self.session = Session.objects.create(user=self.owner, public=public)
-        self.trial = Trial.objects.create(session=self.session)
-        self.detail_url = f'/trials/{self.trial.pk}/'
+    def test_set_session_status(self):
+        # Permission depends on the caller's group, not on visibility
+        self._setup_session(public=False)
+        url = _detail_url('sessions', self.session.pk, 'set_session_status')
+        for role in PERMISSION_PATH_ROLES:
+            with self.subTest(role=role):
+                client = self._clients[role]
+                data = { "status": "archived" }
+                resp = client.post(url, data, format='json')
+
+                expected = SESSION_PERM_MATRIX['set_session_status'][(False, role)]
+                self.assertEqual(resp.status_code, expected)
+
+
+class TrialsPermissionsTests(QueryCountMixin, UserSetupMixin, APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # The detail tests only look at the status code, so they call the
+        # viewset directly and skip URL resolution and the middleware stack
+        cls.factory = APIRequestFactory()
+        cls.detail_view = staticmethod(TrialViewSet.as_view({
+            'get': 'retrieve',
+            'patch': 'partial_update',
+            'delete': 'destroy',
+        }))
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.list_url = '/trials/'
+        # Read by the tests that leave trials untouched; the rest add their own
+        # trials to these sessions
+        cls.public_session, cls.private_session = Session.objects.bulk_create([
+            Session(user=cls.owner, public=True),
+            Session(user=cls.owner, public=False),
+        ])
+        cls.public_trial, cls.private_trial = Trial.objects.bulk_create([
+            Trial(session=cls.public_session),
+            Trial(session=cls.private_session),
+        ])
+
+    def _setup_trial(self, public, **fields):
+        # A fresh trial in the shared session of the given visibility
+        session = self.public_session if public else self.private_session
+        self.trial = Trial.objects.create(session=session, **fields)
+
+    def _shared_trial(self, public):
+        return self.public_trial if public else self.private_trial
+
+    def _call_detail(self, method, trial, role, data=None):
+        request = getattr(self.factory, method)(_detail_url('trials', trial.pk), data)
+        force_authenticate(request, user=self.users[role])
+        return self.detail_view(request, pk=trial.pk)
 
     def test_get_list(self):
         # Test GET /trials/ (list)
-        public_session = Session.objects.create(user=self.owner, public=True)
-        private_session = Session.objects.create(user=self.owner, public=False)
-        public_trial = Trial.objects.create(session=public_session)
-        private_trial = Trial.objects.create(session=private_session)
-
         for role in self.users:
             with self.subTest(role=role):
-                self.client.force_authenticate(user=self.users[role])
-                resp = self.client.get(self.list_url)
+                client = self._clients[role]
+                with self.assertMaxQueries(TRIAL_LIST_MAX_QUERIES[role]):
+                    resp = client.get(self.list_url)
                 # Unverified users should get 200 but only see public trials
                 if role == 'unverified':
                     self.assertEqual(resp.status_code, 200)
                     trial_ids = [t['id'] for t in resp.data]
-                    self.assertIn(str(public_trial.pk), trial_ids)
-                    self.assertNotIn(str(private_trial.pk), trial_ids)
+                    self.assertIn(str(self.public_trial.pk), trial_ids)
+                    self.assertNotIn(str(self.private_trial.pk), trial_ids)
                 else:
                     self.assertEqual(resp.status_code, 200)
 
     def test_get_detail(self):
         # Test GET /trials/<pk>/ (retrieve)
         for public in [False, True]:
-            self._setup_trial(public)
+            trial = self._shared_trial(public)
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    resp = self.client.get(self.detail_url)
+                    resp = self._call_detail('get', trial, role)
 
-                    if role in ['owner', 'admin', 'backend']:
-                        expected = 200
-                    else:
-                        if public is True:
-                            expected = 200
-                        else:
-                            expected = 404
+                    expected = TRIAL_PERM_MATRIX['get_detail'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
     def test_patch(self):
         # Test PATCH /trials/<pk>/ (partial_update)
         for public in [False, True]:
-            self._setup_trial(public)
+            trial = self._shared_trial(public)
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
                     data = { "status": "processing" }
-                    resp = self.client.patch(self.detail_url, data)
+                    resp = self._call_detail('patch', trial, role, data)
 
-                    if role in ['owner', 'admin', 'backend']:
-                        expected = 200
-                    else:
-                        if public is True:
-                            expected = 403
-                        else:
-                            expected = 404 if role == 'other' else 403
+                    expected = TRIAL_PERM_MATRIX['patch'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
     def test_delete(self):
@@ -675,18 +866,15 @@ class TrialsPermissionsTests(UserSetupMixin, APITestCase):
         for public in [False, True]:
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    # Re-create the trial for delete, to make sure the object exists
-                    self._setup_trial(public=public)
-                    self.client.force_authenticate(user=self.users[role])
-                    resp = self.client.delete(self.detail_url)
-                    
-                    if role in ['owner', 'admin', 'backend']:
-                        expected = 204
+                    expected = TRIAL_PERM_MATRIX['delete'][(public, role)]
+
+                    # Only a successful delete needs a trial of its own
+                    if expected == 204:
+                        self._setup_trial(public=public)
+                        trial = self.trial
                     else:
-                        if public is True:
-                            expected = 403
-                        else:
-                            expected = 404 if role == 'other' else 403
+                        trial = self._shared_trial(public)
+                    resp = self._call_detail('delete', trial, role)
                     self.assertEqual(resp.status_code, expected)
    
     def test_dequeue(self):
@@ -695,174 +883,166 @@ class TrialsPermissionsTests(UserSetupMixin, APITestCase):
         for public in [False, True]:
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self._setup_trial(public)
-                    self.trial.status = 'stopped'
-                    self.trial.save()
-                    self.client.force_authenticate(user=self.users[role])
+                    self._setup_trial(public, status='stopped')
+                    client = self._clients[role]
                     url = f'/trials/dequeue/'
-                    resp = self.client.get(url)
-                    if role in ['admin', 'backend']:
-                        expected = 200
-                        self.assertEqual(resp.status_code, expected)
-                    else:
-                        expected = 403
-                        self.assertEqual(resp.status_code, expected)
+                    resp = client.get(url)
+
+                    expected = TRIAL_PERM_MATRIX['dequeue'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_get_trials_with_status(self):
         # Test GET /trials/get_trials_with_status/?status=stopped
         for public in [False, True]:
-            self._setup_trial(public)
-            self.trial.status = 'stopped'
-            self.trial.save()
+            self._setup_trial(public, status='stopped')
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
+                    client = self._clients[role]
                     url = '/trials/get_trials_with_status/?status=stopped'
-                    resp = self.client.get(url)
-                    if role in ['admin', 'backend']:
-                        expected = 200
-                        self.assertEqual(resp.status_code, expected)
+                    resp = client.get(url)
+
+                    expected = TRIAL_PERM_MATRIX['get_trials_with_status'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
+                    if expected == 200:
                         trial_ids = [t['id'] for t in resp.data]
                         self.assertIn(str(self.trial.pk), trial_ids)
-                    else:
-                        expected = 403
-                        self.assertEqual(resp.status_code, expected)
 
     def test_rename(self):
         # Test POST /trials/<pk>/rename/
         for public in [False, True]:
+            url = _detail_url('trials', self._shared_trial(public).pk, 'rename')
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self._setup_trial(public)
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/trials/{self.trial.pk}/rename/'
+                    client = self._clients[role]
                     data = { "trialNewName": "trial_new_name" }
-                    resp = self.client.post(url, data)
-                    
-                    if role in ['owner', 'admin', 'backend']:
-                        expected = 200
-                        self.assertEqual(resp.status_code, expected)
+                    resp = client.post(url, data)
+
+                    expected = TRIAL_PERM_MATRIX['rename'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
+                    if expected == 200:
                         self.assertEqual(resp.data['data']['name'], "trial_new_name")
-                    else:
-                        expected = 404 if role == 'other' else 403
-                        self.assertEqual(resp.status_code, expected)
 
     def test_permanent_remove(self):
         # Test POST /trials/<pk>/permanent_remove/
         for public in [False, True]:
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self._setup_trial(public)
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/trials/{self.trial.pk}/permanent_remove/'
-                    resp = self.client.post(url)
-                    
-                    if role in ['owner', 'admin', 'backend']:
-                        expected = 200
+                    expected = TRIAL_PERM_MATRIX['permanent_remove'][(public, role)]
+
+                    # Only a successful removal needs a trial of its own
+                    if expected == 200:
+                        self._setup_trial(public)
+                        trial = self.trial
                     else:
-                        expected = 404 if role == 'other' else 403
+                        trial = self._shared_trial(public)
+                    client = self._clients[role]
+                    url = _detail_url('trials', trial.pk, 'permanent_remove')
+                    resp = client.post(url)
                     self.assertEqual(resp.status_code, expected)
     
     def test_trash(self):
         # Test POST /trials/<pk>/trash/
         for public in [False, True]:
+            url = _detail_url('trials', self._shared_trial(public).pk, 'trash')
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self._setup_trial(public)
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/trials/{self.trial.pk}/trash/'
-                    resp = self.client.post(url)
-                    
-                    if role in ['owner', 'admin', 'backend']:
-                        expected = 200
-                    else:
-                        expected = 404 if role == 'other' else 403
+                    client = self._clients[role]
+                    resp = client.post(url)
+
+                    expected = TRIAL_PERM_MATRIX['trash'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
     def test_restore(self):
         # Test POST /trials/<pk>/restore/
         for public in [False, True]:
+            url = _detail_url('trials', self._shared_trial(public).pk, 'restore')
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self._setup_trial(public)
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/trials/{self.trial.pk}/restore/'
-                    resp = self.client.post(url)
-                    
-                    if role in ['owner', 'admin', 'backend']:
-                        expected = 200
-                    else:
-                        expected = 404 if role == 'other' else 403
+                    client = self._clients[role]
+                    resp = client.post(url)
+
+                    expected = TRIAL_PERM_MATRIX['restore'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
     
     def test_modifyTags(self):
         # Test POST /trials/<pk>/modifyTags/
         for public in [False, True]:
+            url = _detail_url('trials', self._shared_trial(public).pk, 'modifyTags')
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self._setup_trial(public)
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/trials/{self.trial.pk}/modifyTags/'
+                    client = self._clients[role]
                     data = { "trialNewTags": ["tag1", "tag2"] }
-                    resp = self.client.post(url, data)
-                    
-                    if role in ['owner', 'admin', 'backend']:
-                        expected = 200
-                    else:
-                        expected = 404 if role == 'other' else 403
+                    resp = client.post(url, data)
+
+                    expected = TRIAL_PERM_MATRIX['modifyTags'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
 
 class ResultsPermissionsTests(UserSetupMixin, APITestCase):
-    def setUp(self):
-        self.setUpUsers()
-        self.list_url = '/results/'
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.list_url = '/results/'
+        # Read by the tests that leave results untouched; the rest add their own
+        # results to these trials
+        public_session, private_session = Session.objects.bulk_create([
+            Session(user=cls.owner, public=True),
+            Session(user=cls.owner, public=False),
+        ])
+        cls.public_trial, cls.private_trial = Trial.objects.bulk_create([
+            Trial(session=public_session),
+            Trial(session=private_session),
+        ])
+        cls.public_result, cls.private_result = Result.objects.bulk_create([
+            Result(trial=cls.public_trial, device_id='dev123', tag='tag1'),
+            Result(trial=cls.private_trial, device_id='dev123', tag='tag1'),
+        ])
 
     def _setup_result(self, public):
-        self.session = Session.objects.create(user=self.owner, public=public)
-        self.trial = Trial.objects.create(session=self.session)
+        # A fresh result on the shared trial of the given visibility
+        self.trial = self.public_trial if public else self.private_trial
         self.result = Result.objects.create(trial=self.trial, device_id='dev123', tag='tag1')
-        self.detail_url = f'/results/{self.result.pk}/'
+        self.detail_url = _detail_url('results', self.result.pk)
 
     def test_get_list(self):
         # Test GET /results/ (list)
         for role in self.users:
             with self.subTest(role=role):
-                self.client.force_authenticate(user=self.users[role])
-                resp = self.client.get(self.list_url)
-                if role in ['owner', 'admin', 'backend', 'other']:
-                    self.assertEqual(resp.status_code, 200)
-                else:
-                    self.assertEqual(resp.status_code, 403)
+                client = self._clients[role]
+                resp = client.get(self.list_url)
+
+                expected = RESULT_PERM_MATRIX['get_list'][(False, role)]
+                self.assertEqual(resp.status_code, expected)
 
     def test_get_detail(self):
         # Test GET /results/<pk>/ (retrieve)
         for public in [False, True]:
-            self._setup_result(public)
+            result = self.public_result if public else self.private_result
+            detail_url = _detail_url('results', result.pk)
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
-                    resp = self.client.get(self.detail_url)
-                    if role in ['owner', 'admin', 'backend']:
-                        self.assertEqual(resp.status_code, 200)
-                    else:
-                        self.assertEqual(resp.status_code, 403)
+                    client = self._clients[role]
+                    resp = client.get(detail_url)
+
+                    expected = RESULT_PERM_MATRIX['get_detail'][(public, role)]
+                    self.assertEqual(resp.status_code, expected)
 
     def test_post(self):
         # Test POST /results/
         for public in [False, True]:
-            self._setup_result(public)
+            trial = self.public_trial if public else self.private_trial
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
+                    client = self._clients[role]
                     data = {
-                        "trial": self.trial.pk,
+                        "trial": trial.pk,
                         "tag": "new_tag",
                         "device_id": "dev999",
                         "media_url": "fakekey"
                     }
-                    resp = self.client.post(self.list_url, data)
-                    expected = 201 if role in ['owner', 'admin', 'backend'] else 403
+                    resp = client.post(self.list_url, data)
+
+                    expected = RESULT_PERM_MATRIX['post'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
     def test_put(self):
@@ -871,15 +1051,16 @@ class ResultsPermissionsTests(UserSetupMixin, APITestCase):
             self._setup_result(public)
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
+                    client = self._clients[role]
                     data = {
                         "trial": self.trial.pk,
                         "tag": "updated_tag",
                         "device_id": "dev123",
                         "media_url": "fakekey"
                     }
-                    resp = self.client.put(self.detail_url, data)
-                    expected = 200 if role in ['owner', 'admin', 'backend'] else 403
+                    resp = client.put(self.detail_url, data)
+
+                    expected = RESULT_PERM_MATRIX['put'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
     def test_patch(self):
@@ -888,10 +1069,11 @@ class ResultsPermissionsTests(UserSetupMixin, APITestCase):
             self._setup_result(public)
             for role in self.users:
                 with self.subTest(role=role, public=public):
-                    self.client.force_authenticate(user=self.users[role])
+                    client = self._clients[role]
                     data = { "tag": "patched_tag" }
-                    resp = self.client.patch(self.detail_url, data)
-                    expected = 200 if role in ['owner', 'admin', 'backend'] else 403
+                    resp = client.patch(self.detail_url, data)
+
+                    expected = RESULT_PERM_MATRIX['patch'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
     def test_delete(self):
@@ -901,20 +1083,25 @@ class ResultsPermissionsTests(UserSetupMixin, APITestCase):
                 with self.subTest(role=role, public=public):
                     # Re-create the result for delete, to make sure the object exists
                     self._setup_result(public=public)
-                    self.client.force_authenticate(user=self.users[role])
-                    resp = self.client.delete(self.detail_url)
-                    expected = 204 if role in ['owner', 'admin', 'backend'] else 403
+                    client = self._clients[role]
+                    resp = client.delete(self.detail_url)
+
+                    expected = RESULT_PERM_MATRIX['delete'][(public, role)]
                     self.assertEqual(resp.status_code, expected)
 
 
 class SubjectPermissionsTests(UserSetupMixin, APITestCase):
-    def setUp(self):
-        self.setUpUsers()
-        self.list_url = '/subjects/'
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.list_url = '/subjects/'
+        # Read by the tests that leave subjects untouched; the rest build their own
+        cls.owner_subject = Subject.objects.create(name='test_subject', user=cls.owner)
+        cls.other_subject = Subject.objects.create(name='other_subject', user=cls.other_user)
 
     def _setup_subject(self):
         self.subject = Subject.objects.create(name='test_subject', user=self.owner)
-        self.detail_url = f'/subjects/{self.subject.pk}/'
+        self.detail_url = _detail_url('subjects', self.subject.pk)
 
     def _returned_ids(self, resp):
         # Ids come back as UUIDs; compare as strings to avoid type mismatches.
@@ -923,20 +1110,17 @@ class SubjectPermissionsTests(UserSetupMixin, APITestCase):
     def test_get_list(self):
         # Test GET /subjects/ (list) - by default every user, including admin
         # and backend, only sees their own subjects.
-        self._setup_subject()
-        other_subject = Subject.objects.create(name='other_subject', user=self.other_user)
-
         # Exact subjects each role should see by default (their own only).
         expected_ids = {
-            'owner': {str(self.subject.pk)},
+            'owner': {str(self.owner_subject.pk)},
             'admin': set(),
             'backend': set(),
-            'other': {str(other_subject.pk)},
+            'other': {str(self.other_subject.pk)},
         }
         for role in self.users:
             with self.subTest(role=role):
-                self.client.force_authenticate(user=self.users[role])
-                resp = self.client.get(self.list_url)
+                client = self._clients[role]
+                resp = client.get(self.list_url)
 
                 if role in expected_ids:
                     self.assertEqual(resp.status_code, 200)
@@ -948,21 +1132,19 @@ class SubjectPermissionsTests(UserSetupMixin, APITestCase):
     def test_get_list_all_subjects_flag(self):
         # Test GET /subjects/?all_subjects=true - admin/backend can list every
         # user's subjects; the flag is ignored for everyone else.
-        self._setup_subject()
-        other_subject = Subject.objects.create(name='other_subject', user=self.other_user)
-        all_ids = {str(self.subject.pk), str(other_subject.pk)}
+        all_ids = {str(self.owner_subject.pk), str(self.other_subject.pk)}
 
         # Elevated roles see every subject; everyone else still only their own.
         expected_ids = {
             'admin': all_ids,
             'backend': all_ids,
-            'owner': {str(self.subject.pk)},
-            'other': {str(other_subject.pk)},
+            'owner': {str(self.owner_subject.pk)},
+            'other': {str(self.other_subject.pk)},
         }
         for role in self.users:
             with self.subTest(role=role):
-                self.client.force_authenticate(user=self.users[role])
-                resp = self.client.get(self.list_url, {'all_subjects': 'true'})
+                client = self._clients[role]
+                resp = client.get(self.list_url, {'all_subjects': 'true'})
 
                 if role in expected_ids:
                     self.assertEqual(resp.status_code, 200)
@@ -973,131 +1155,98 @@ class SubjectPermissionsTests(UserSetupMixin, APITestCase):
 
     def test_get_detail(self):
         # Test GET /subjects/<pk>/ (retrieve)
-        self._setup_subject()
+        detail_url = _detail_url('subjects', self.owner_subject.pk)
         for role in self.users:
             with self.subTest(role=role):
-                self.client.force_authenticate(user=self.users[role])
-                resp = self.client.get(self.detail_url)
-                if role in ['owner', 'admin', 'backend']:
-                    self.assertEqual(resp.status_code, 200)
-                elif role == 'other':
-                    self.assertEqual(resp.status_code, 404)
-                else:
-                    self.assertEqual(resp.status_code, 403)
+                client = self._clients[role]
+                resp = client.get(detail_url)
+
+                expected = SUBJECT_PERM_MATRIX['get_detail'][role]
+                self.assertEqual(resp.status_code, expected)
     
     def test_post(self):
         for role in self.users:
             with self.subTest(role=role):
-                self.client.force_authenticate(user=self.users[role])
+                client = self._clients[role]
                 data = { "name": "new_subject" }
-                resp = self.client.post(self.list_url, data)
+                resp = client.post(self.list_url, data)
 
-                if role in ['owner', 'admin', 'backend', 'other']:
-                    self.assertEqual(resp.status_code, 201)
-                else:
-                    self.assertEqual(resp.status_code, 403)
+                expected = SUBJECT_PERM_MATRIX['post'][role]
+                self.assertEqual(resp.status_code, expected)
 
     def test_put(self):
         for role in self.users:
             with self.subTest(role=role):
                 self._setup_subject()
-                self.client.force_authenticate(user=self.users[role])
+                client = self._clients[role]
                 data = { "id": self.subject.pk,
                          "name": 'new_subject_name',
                          "subject_tags": ['one', 'two'] }
-                resp = self.client.put(self.detail_url, data)
+                resp = client.put(self.detail_url, data)
 
-                if role in ['owner', 'admin', 'backend']:
-                    self.assertEqual(resp.status_code, 200)
-                elif role == 'other':
-                    self.assertEqual(resp.status_code, 404)
-                else:
-                    self.assertEqual(resp.status_code, 403)
+                expected = SUBJECT_PERM_MATRIX['put'][role]
+                self.assertEqual(resp.status_code, expected)
 
     def test_patch(self):
         for role in self.users:
             with self.subTest(role=role):
                 self._setup_subject()
-                self.client.force_authenticate(user=self.users[role])
+                client = self._clients[role]
                 data = { "id": self.subject.pk,
                          "name": 'new_subject_name',
                          "subject_tags": ['one', 'two'] }
-                resp = self.client.patch(self.detail_url, data)
+                resp = client.patch(self.detail_url, data)
 
-                if role in ['owner', 'admin', 'backend']:
-                    self.assertEqual(resp.status_code, 200)
-                elif role == 'other':
-                    self.assertEqual(resp.status_code, 404)
-                else:
-                    self.assertEqual(resp.status_code, 403)
+                expected = SUBJECT_PERM_MATRIX['patch'][role]
+                self.assertEqual(resp.status_code, expected)
 
     def test_delete(self):
         for role in self.users:
             with self.subTest(role=role):
                 self._setup_subject()
-                self.client.force_authenticate(user=self.users[role])
-                resp = self.client.delete(self.detail_url)
+                client = self._clients[role]
+                resp = client.delete(self.detail_url)
 
-                if role in ['owner', 'admin', 'backend']:
-                    self.assertEqual(resp.status_code, 204)
-                elif role == 'other':
-                    self.assertEqual(resp.status_code, 404)
-                else:
-                    self.assertEqual(resp.status_code, 403)
+                expected = SUBJECT_PERM_MATRIX['delete'][role]
+                self.assertEqual(resp.status_code, expected)
 
     def test_trash(self):
         for role in self.users:
             with self.subTest(role=role):
                 self._setup_subject()
-                self.client.force_authenticate(user=self.users[role])
-                url = f'/subjects/{self.subject.pk}/trash/'
-                resp = self.client.post(url)
+                client = self._clients[role]
+                url = _detail_url('subjects', self.subject.pk, 'trash')
+                resp = client.post(url)
 
-                if role in ['owner']:
-                    self.assertEqual(resp.status_code, 200)
-                elif role in ['admin', 'backend', 'other']:
-                    self.assertEqual(resp.status_code, 404)
-                else:
-                    self.assertEqual(resp.status_code, 403)
+                expected = SUBJECT_PERM_MATRIX['trash'][role]
+                self.assertEqual(resp.status_code, expected)
     
     def test_restore(self):
         for role in self.users:
             with self.subTest(role=role):
                 self._setup_subject()
-                self.client.force_authenticate(user=self.users[role])
-                url = f'/subjects/{self.subject.pk}/restore/'
-                resp = self.client.post(url)
+                client = self._clients[role]
+                url = _detail_url('subjects', self.subject.pk, 'restore')
+                resp = client.post(url)
 
-                if role in ['owner']:
-                    self.assertEqual(resp.status_code, 200)
-                elif role in ['admin', 'backend', 'other']:
-                    self.assertEqual(resp.status_code, 404)
-                else:
-                    self.assertEqual(resp.status_code, 403)
+                expected = SUBJECT_PERM_MATRIX['restore'][role]
+                self.assertEqual(resp.status_code, expected)
 
     @mock.patch('mcserver.views.downloadAndZipSubject')
     def test_download(self, mock_download_and_zip):
+        # One archive serves every role
+        mock_download_and_zip.return_value = _make_dummy_zip()
+        self.addCleanup(os.remove, mock_download_and_zip.return_value)
+        url = _detail_url('subjects', self.owner_subject.pk, 'download')
         for role in self.users:
             with self.subTest(role=role):
-                # Create a temporary zip file
-                with tempfile.NamedTemporaryFile(suffix='.zip') as tmp_zip:
-                    with zipfile.ZipFile(tmp_zip.name, 'w') as zf:
-                        zf.writestr('dummy.txt', 'dummy content')
-                    tmp_zip.flush()
-                    mock_download_and_zip.return_value = tmp_zip.name
-
-                    self._setup_subject()
-                    self.client.force_authenticate(user=self.users[role])
-                    url = f'/subjects/{self.subject.pk}/download/'
-                    resp = self.client.get(url)
+                client = self._clients[role]
+                resp = client.get(url)
 
-                    if role == 'owner':
-                        self.assertEqual(resp.status_code, 200)
-                        self.assertEqual(resp['Content-Type'], 'application/zip')
-                    elif role in ['admin', 'backend', 'other']:
-                        self.assertEqual(resp.status_code, 404)
-                    else:
-                        self.assertEqual(resp.status_code, 403)
+                expected = SUBJECT_PERM_MATRIX['download'][role]
+                self.assertEqual(resp.status_code, expected)
+                if expected == 200:
+                    self.assertEqual(resp['Content-Type'], 'application/zip')
 
     @mock.patch('mcserver.tasks.download_subject_archive.delay')
     def test_async_download(self, mock_download_task):
@@ -1105,32 +1254,24 @@ class SubjectPermissionsTests(UserSetupMixin, APITestCase):
         mock_task.id = 'fake-download_subject_archive-id'
         mock_download_task.return_value = mock_task
         # Test GET /subject/<pk>/async-download/
-        self._setup_subject()
+        url = _detail_url('subjects', self.owner_subject.pk, 'async-download')
         for role in self.users:
             with self.subTest(role=role):
-                self.client.force_authenticate(user=self.users[role])
-                url = f'/subjects/{self.subject.pk}/async-download/'
-                resp = self.client.get(url)
+                client = self._clients[role]
+                resp = client.get(url)
 
-                if role == 'owner':
-                    self.assertEqual(resp.status_code, 200)
+                expected = SUBJECT_PERM_MATRIX['async_download'][role]
+                self.assertEqual(resp.status_code, expected)
+                if expected == 200:
                     self.assertEqual(resp.data, {'task_id': 'fake-download_subject_archive-id'})
-                elif role in ['admin', 'backend', 'other']:
-                    self.assertEqual(resp.status_code, 404)
-                else:
-                    self.assertEqual(resp.status_code, 403)
 
     def test_permanent_remove(self):
         for role in self.users:
             with self.subTest(role=role):
                 self._setup_subject()
-                self.client.force_authenticate(user=self.users[role])
-                url = f'/subjects/{self.subject.pk}/permanent_remove/'
-                resp = self.client.post(url)
+                client = self._clients[role]
+                url = _detail_url('subjects', self.subject.pk, 'permanent_remove')
+                resp = client.post(url)
 
-                if role == 'owner':
-                    self.assertEqual(resp.status_code, 200)
-                elif role in ['admin', 'backend', 'other']:
-                    self.assertEqual(resp.status_code, 404)
-                else:
-                    self.assertEqual(resp.status_code, 403)
+                expected = SUBJECT_PERM_MATRIX['permanent_remove'][role]
+                self.assertEqual(resp.status_code, expected)